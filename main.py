@@ -11,24 +11,29 @@ Options:
     --images-dir DIR    Directory to save extracted images
     --pages START-END   Page range to convert (e.g., 1-2 for first 2 pages)
     --folder DIR        Convert all PDF files in the specified directory
+    --concurrency N     Number of pages analyzed by the VLM in parallel
+    --vlm-batch N       Number of page images sent per VLM request
+    --jobs N            Number of PDFs converted in parallel (folder mode)
 """
 
 import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from ollama_client import OllamaClient
 from pdf2md import PDF2Markdown
 
 
 def parse_page_range(page_str: str) -> tuple:
     """Parse page range string like '1-3' to (0, 2) tuple."""
+    head, sep, tail = page_str.partition('-')
     try:
-        if '-' in page_str:
-            start, end = page_str.split('-')
-            return (int(start) - 1, int(end) - 1)  # Convert to 0-indexed
-        else:
-            page = int(page_str) - 1
-            return (page, page)
+        if sep:
+            return (int(head) - 1, int(tail) - 1)  # Convert to 0-indexed
+        page = int(head) - 1
+        return (page, page)
     except ValueError:
         raise argparse.ArgumentTypeError(f"Invalid page range: {page_str}")
 
@@ -42,11 +47,22 @@ def convert_single_pdf(pdf_path: Path, args):
         print(f"Pages:  {args.pages[0] + 1} to {args.pages[1] + 1}")
     print()
     
-    with PDF2Markdown(str(pdf_path), model=args.model) as converter:
+    with PDF2Markdown(str(pdf_path), model=args.model,
+                      concurrency=args.concurrency,
+                      vlm_batch=args.vlm_batch,
+                      vlm_cache_size=args.vlm_cache_size,
+                      vlm_max_px=args.vlm_max_px,
+                      vlm_jpeg_quality=args.vlm_jpeg_quality,
+                      verbose=args.verbose,
+                      ollama_num_batch=args.ollama_batch_size,
+                      dpi_text=args.dpi_text,
+                      dpi_figure=args.dpi_figure,
+                      render_procs=args.render_procs) as converter:
         output_path = converter.convert(
             output_path=args.output,
             images_dir=args.images_dir,
-            page_range=args.pages
+            page_range=args.pages,
+            force_refresh=args.force_refresh
         )
     
     print(f"\n=== Conversion Complete ===")
@@ -54,10 +70,59 @@ def convert_single_pdf(pdf_path: Path, args):
     return output_path
 
 
+def _convert_one(pdf_path_str: str, args, client=None) -> str:
+    """
+    Convert one PDF to Markdown; used as the worker for parallel folder mode.
+
+    Must be a module-level function so it can be pickled into worker processes.
+    Workers build their own converter (and Ollama connection); the sequential
+    folder loop passes a shared client instead.
+    """
+    with PDF2Markdown(pdf_path_str, model=args.model,
+                      concurrency=args.concurrency,
+                      vlm_batch=args.vlm_batch,
+                      vlm_cache_size=args.vlm_cache_size,
+                      vlm_max_px=args.vlm_max_px,
+                      vlm_jpeg_quality=args.vlm_jpeg_quality,
+                      verbose=args.verbose,
+                      ollama_num_batch=args.ollama_batch_size,
+                      dpi_text=args.dpi_text,
+                      dpi_figure=args.dpi_figure,
+                      render_procs=args.render_procs,
+                      client=client) as converter:
+        return converter.convert(
+            images_dir=args.images_dir,
+            page_range=args.pages,
+            force_refresh=args.force_refresh
+        )
+
+
+def find_pdf_files(folder_path: Path, recursive: bool = False) -> list:
+    """
+    Find PDF files in a folder with a single directory scan.
+
+    Matches any case of the .pdf suffix (.pdf, .PDF, .Pdf, ...) without
+    walking the directory once per case variant.
+
+    Args:
+        folder_path: Directory to scan
+        recursive: Also search subdirectories
+
+    Returns:
+        List of Path objects for the PDF files found
+    """
+    if recursive:
+        return [Path(root) / name
+                for root, _dirs, names in os.walk(folder_path)
+                for name in names if name.lower().endswith('.pdf')]
+    return [Path(entry.path) for entry in os.scandir(folder_path)
+            if entry.is_file() and entry.name.lower().endswith('.pdf')]
+
+
 def convert_folder(folder_path: Path, args):
     """Convert all PDF files in a folder to Markdown."""
-    pdf_files = list(folder_path.glob("*.pdf")) + list(folder_path.glob("*.PDF"))
-    
+    pdf_files = find_pdf_files(folder_path, recursive=args.recursive)
+
     if not pdf_files:
         print(f"No PDF files found in: {folder_path}", file=sys.stderr)
         sys.exit(1)
@@ -72,29 +137,54 @@ def convert_folder(folder_path: Path, args):
     
     successful = []
     failed = []
-    
-    for i, pdf_file in enumerate(sorted(pdf_files), 1):
-        print(f"\n{'='*50}")
-        print(f"[{i}/{len(pdf_files)}] Processing: {pdf_file.name}")
-        print(f"{'='*50}")
-        
-        try:
-            with PDF2Markdown(str(pdf_file), model=args.model) as converter:
-                output_path = converter.convert(
-                    images_dir=args.images_dir,
-                    page_range=args.pages
-                )
-            successful.append((pdf_file.name, output_path))
-            print(f"✓ Completed: {pdf_file.name}")
-        except Exception as e:
-            failed.append((pdf_file.name, str(e)))
-            print(f"✗ Failed: {pdf_file.name} - {e}")
+    sorted_files = sorted(pdf_files)
+    total = len(sorted_files)
+
+    if args.jobs > 1:
+        # Each PDF is independent, so convert several at once in worker
+        # processes; rendering is CPU-bound and scales with process count
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(_convert_one, str(pdf_file), args): pdf_file
+                       for pdf_file in sorted_files}
+            for i, future in enumerate(as_completed(futures), 1):
+                name = futures[future].name
+                try:
+                    output_path = future.result()
+                    successful.append((name, output_path))
+                    print(f"[{i}/{total}] ✓ Completed: {name}")
+                except Exception as e:
+                    failed.append((name, str(e)))
+                    print(f"[{i}/{total}] ✗ Failed: {name} - {e}")
+    else:
+        # One client for the whole folder: verify the connection once and
+        # share the HTTP connection and VLM caches across PDFs
+        shared_client = OllamaClient(model=args.model,
+                                     cache_size=args.vlm_cache_size,
+                                     max_px=args.vlm_max_px,
+                                     jpeg_quality=args.vlm_jpeg_quality,
+                                     verbose=args.verbose,
+                                     num_batch=args.ollama_batch_size)
+
+        for i, pdf_file in enumerate(sorted_files, 1):
+            name = pdf_file.name
+            print(f"\n{'='*50}")
+            print(f"[{i}/{total}] Processing: {name}")
+            print(f"{'='*50}")
+
+            try:
+                output_path = _convert_one(str(pdf_file), args,
+                                           client=shared_client)
+                successful.append((name, output_path))
+                print(f"✓ Completed: {name}")
+            except Exception as e:
+                failed.append((name, str(e)))
+                print(f"✗ Failed: {name} - {e}")
     
     # Print summary
     print(f"\n{'='*50}")
     print(f"=== Batch Conversion Summary ===")
     print(f"{'='*50}")
-    print(f"Total:      {len(pdf_files)}")
+    print(f"Total:      {total}")
     print(f"Successful: {len(successful)}")
     print(f"Failed:     {len(failed)}")
     
@@ -137,6 +227,8 @@ Examples:
     parser.add_argument("pdf_file", nargs="?", help="Path to the PDF file to convert")
     parser.add_argument("--folder", "-f",
                         help="Convert all PDF files in the specified directory")
+    parser.add_argument("--recursive", "-r", action="store_true",
+                        help="Also search subdirectories for PDFs (folder mode)")
     parser.add_argument("--model", default="qwen3-vl", 
                         help="Ollama vision model to use (default: qwen3-vl)")
     parser.add_argument("--output", "-o", 
@@ -145,6 +237,48 @@ Examples:
                         help="Directory to save extracted images")
     parser.add_argument("--pages", type=parse_page_range,
                         help="Page range to convert (e.g., '1-2' for pages 1-2)")
+    parser.add_argument("--concurrency", type=int,
+                        default=min(8, os.cpu_count() or 1),
+                        help="Number of concurrent VLM page requests "
+                             "(default: min(8, CPU count))")
+    parser.add_argument("--vlm-batch", type=int, default=1,
+                        help="Number of page images sent per VLM request; "
+                             "models that handle multiple images can batch "
+                             "3-5 pages per call (default: 1)")
+    parser.add_argument("--vlm-cache-size", type=int, default=256,
+                        help="Max cached VLM outputs keyed by page image "
+                             "content; identical pages skip the VLM call "
+                             "(0 disables, default: 256)")
+    parser.add_argument("--vlm-max-px", type=int, default=1536,
+                        help="Pixel budget for the longest side of images "
+                             "sent to the VLM; larger images are downscaled "
+                             "to cut vision tokens (0 disables, default: 1536)")
+    parser.add_argument("--vlm-jpeg-quality", type=int, default=85,
+                        help="JPEG quality used when re-encoding downscaled "
+                             "VLM images (default: 85)")
+    parser.add_argument("--render-procs", type=int, default=1,
+                        help="Number of subprocesses rendering pages of one "
+                             "PDF; helps on 100+ page documents in the "
+                             "sequential and --vlm-batch paths (default: 1)")
+    parser.add_argument("--dpi-text", type=int, default=110,
+                        help="Render DPI for text-only pages; rendering cost "
+                             "grows quadratically with DPI (default: 110)")
+    parser.add_argument("--dpi-figure", type=int, default=150,
+                        help="Render DPI for pages containing figures "
+                             "(default: 150)")
+    parser.add_argument("--ollama-batch-size", type=int, default=256,
+                        help="Ollama num_batch option controlling prompt-eval "
+                             "batch size on the server (0 = server default, "
+                             "default: 256)")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Reprocess every page even when a cached result "
+                             "for this PDF exists under ~/.cache/pdf2md")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Print Ollama connection info and model list")
+    parser.add_argument("--jobs", "-j", type=int,
+                        default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Number of PDFs converted in parallel in folder "
+                             "mode (default: CPU count - 1)")
     
     args = parser.parse_args()
     
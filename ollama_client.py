@@ -1,170 +1,381 @@
-"""
-Ollama VLM Client for PDF analysis and image description.
-"""
-
-import base64
-import os
-import ollama
-from pathlib import Path
-
-# Ollama server configuration - defaults to localhost, can be overridden via environment variable
-OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
-
-
-class OllamaClient:
-    """Client for interacting with Ollama vision models."""
-    
-    def __init__(self, model: str = "qwen3-vl", host: str = OLLAMA_HOST):
-        """
-        Initialize the Ollama client.
-        
-        Args:
-            model: The vision model to use (e.g., 'qwen3-vl', 'llava', 'llama3.2-vision')
-            host: Ollama server URL
-        """
-        self.model = model
-        self.host = host
-        self.client = ollama.Client(host=host)
-        self._verify_connection()
-    
-    def _verify_connection(self):
-        """Verify Ollama is running and model is available."""
-        try:
-            models_response = self.client.list()
-            # Handle both Pydantic model and dict response formats
-            if hasattr(models_response, 'models'):
-                available = [m.model for m in models_response.models]
-            else:
-                available = [m['name'] for m in models_response.get('models', [])]
-            
-            available_base = [m.split(':')[0] for m in available]
-            
-            print(f"Connected to Ollama at {self.host}")
-            print(f"Available models: {available}")
-            
-            if self.model.split(':')[0] not in available_base:
-                print(f"Warning: Model '{self.model}' not found.")
-                # Try to find a vision model
-                vision_keywords = ['llava', 'vision', 'vl', 'qwen3-vl']
-                vision_models = [m for m in available if any(v in m.lower() for v in vision_keywords)]
-                if vision_models:
-                    self.model = vision_models[0]
-                    print(f"Using available vision model: {self.model}")
-        except Exception as e:
-            raise ConnectionError(f"Cannot connect to Ollama at {self.host}. Error: {e}")
-    
-    def _clean_vlm_output(self, content: str) -> str:
-        """
-        Clean VLM output by removing thinking noise and markdown wrappers.
-        
-        Some VLMs include their internal reasoning in the output like:
-        'Wait, no...', 'Let me think...', 'So final Markdown:', etc.
-        This method removes such noise.
-        """
-        import re
-        
-        # Remove thinking/reasoning patterns
-        thinking_patterns = [
-            r'\n*Wait,\s*no[^\n]*\n',  # "Wait, no..."
-            r'\n*Let me[^\n]*\n',  # "Let me think/check..."
-            r'\n*So final [Mm]arkdown:[^\n]*\n',  # "So final Markdown:"
-            r'\n*Actually,[^\n]*\n',  # "Actually,..."
-            r'\n*I notice[^\n]*\n',  # "I notice..."
-            r'\n*Looking at[^\n]*\n',  # "Looking at the image..."
-        ]
-        
-        for pattern in thinking_patterns:
-            content = re.sub(pattern, '\n', content, flags=re.IGNORECASE)
-        
-        # Remove markdown code block wrapper if present (```markdown ... ```)
-        content = re.sub(r'^```(?:markdown)?\s*\n', '', content)
-        content = re.sub(r'\n```\s*$', '', content)
-        
-        # Clean up multiple consecutive blank lines
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        
-        return content.strip()
-    
-    def analyze_page_image(self, image_path: str) -> str:
-        """
-        Analyze a PDF page image to extract structured content as Markdown.
-        
-        Args:
-            image_path: Path to the page image
-            
-        Returns:
-            Markdown formatted content of the page
-        """
-        prompt = """Analyze this PDF page image and convert its content to Markdown format.
-
-CRITICAL: Pay special attention to CODE BLOCKS and SHELL COMMANDS that may appear in LIGHT GRAY BOXES 
-with GRAY or FAINT TEXT. These low-contrast code sections are VERY IMPORTANT and MUST NOT be skipped.
-Look carefully for command-line examples with $ prompts, even if the text appears light or faded.
-
-Rules:
-1. Preserve the document structure (headings, paragraphs, lists, tables, code blocks)
-2. CAREFULLY EXTRACT ALL CODE BLOCKS - especially those in gray/light boxes with faint text:
-   - Shell commands starting with $ (e.g., $ bash script.sh, $ ./compile.sh, $ adb push)
-   - File paths and command examples, even if they appear in low contrast
-   - Do NOT skip any code section, even if the text is light gray on light background
-3. Use proper Markdown syntax:
-   - # for main titles, ## for sections, ### for subsections
-   - - or * for bullet lists, 1. 2. 3. for numbered lists
-   - | for tables with proper alignment
-   - ``` for code blocks (use ```bash for shell commands)
-   - > for quotes or callouts/notes
-4. For images/diagrams in the page, write: ![Description of the image](image_placeholder)
-5. Maintain reading order (top to bottom, left to right)
-6. Keep text accurate - do not paraphrase or summarize
-7. For headers/footers, you can skip or mark as <!-- header --> or <!-- footer -->
-
-Output ONLY the Markdown content, no explanations."""
-
-        response = self.client.chat(
-            model=self.model,
-            messages=[{
-                'role': 'user',
-                'content': prompt,
-                'images': [image_path]
-            }]
-        )
-        
-        # Clean up VLM output to remove thinking noise
-        content = response['message']['content']
-        return self._clean_vlm_output(content)
-    
-    def describe_image(self, image_path: str) -> str:
-        """
-        Generate a description for an extracted image/diagram.
-        
-        Args:
-            image_path: Path to the image file
-            
-        Returns:
-            Text description of the image
-        """
-        prompt = """Describe this image/diagram concisely for a Markdown document.
-Focus on:
-- What type of image it is (screenshot, diagram, chart, illustration)
-- Key elements and their relationships
-- Any text visible in the image
-- The purpose or meaning it conveys
-
-Provide a 1-3 sentence description suitable for an image alt-text."""
-
-        response = self.client.chat(
-            model=self.model,
-            messages=[{
-                'role': 'user',
-                'content': prompt,
-                'images': [image_path]
-            }]
-        )
-        
-        return response['message']['content'].strip()
-
-
-if __name__ == "__main__":
-    # Quick test
-    client = OllamaClient()
-    print(f"Ollama client initialized with model: {client.model}")
+"""
+Ollama VLM Client for PDF analysis and image description.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Ollama server configuration - defaults to localhost, can be overridden via environment variable
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+# On-disk VLM output cache shared across CLI invocations
+CACHE_DIR = Path.home() / ".cache" / "pdf2md"
+
+# Precompiled cleanup patterns - _clean_vlm_output runs once per page, so the
+# thinking-noise patterns are collapsed into a single alternation scanned once
+_THINKING_RE = re.compile(
+    r'\n*(?:Wait,\s*no|Let me|So final [Mm]arkdown:|Actually,|I notice|Looking at)[^\n]*\n',
+    re.IGNORECASE)
+_FENCE_OPEN_RE = re.compile(r'^```(?:markdown)?\s*\n')
+_FENCE_CLOSE_RE = re.compile(r'\n```\s*$')
+_BLANKS_RE = re.compile(r'\n{3,}')
+
+# Prompts are module-level constants so every call sends byte-identical text,
+# letting Ollama's prompt-prefix KV cache hit on each page
+_ANALYZE_RULES = """CRITICAL: Pay special attention to CODE BLOCKS and SHELL COMMANDS that may appear in LIGHT GRAY BOXES
+with GRAY or FAINT TEXT. These low-contrast code sections are VERY IMPORTANT and MUST NOT be skipped.
+Look carefully for command-line examples with $ prompts, even if the text appears light or faded.
+
+Rules:
+1. Preserve the document structure (headings, paragraphs, lists, tables, code blocks)
+2. CAREFULLY EXTRACT ALL CODE BLOCKS - especially those in gray/light boxes with faint text:
+   - Shell commands starting with $ (e.g., $ bash script.sh, $ ./compile.sh, $ adb push)
+   - File paths and command examples, even if they appear in low contrast
+   - Do NOT skip any code section, even if the text is light gray on light background
+3. Use proper Markdown syntax:
+   - # for main titles, ## for sections, ### for subsections
+   - - or * for bullet lists, 1. 2. 3. for numbered lists
+   - | for tables with proper alignment
+   - ``` for code blocks (use ```bash for shell commands)
+   - > for quotes or callouts/notes
+4. For images/diagrams in the page, write: ![Description of the image](image_placeholder)
+5. Maintain reading order (top to bottom, left to right)
+6. Keep text accurate - do not paraphrase or summarize
+7. For headers/footers, you can skip or mark as <!-- header --> or <!-- footer -->
+
+Output ONLY the Markdown content, no explanations."""
+
+_ANALYZE_PROMPT = ("Analyze this PDF page image and convert its content to "
+                   "Markdown format.\n\n" + _ANALYZE_RULES)
+
+_DESCRIBE_PROMPT = """Describe this image/diagram concisely for a Markdown document.
+Focus on:
+- What type of image it is (screenshot, diagram, chart, illustration)
+- Key elements and their relationships
+- Any text visible in the image
+- The purpose or meaning it conveys
+
+Provide a 1-3 sentence description suitable for an image alt-text."""
+
+
+class OllamaClient:
+    """Client for interacting with Ollama vision models."""
+
+    # (host, requested model) -> resolved model for connections already
+    # verified in this process - converting a folder of PDFs shouldn't pay
+    # one /api/tags round-trip per file
+    _verified = {}
+
+    def __init__(self, model: str = "qwen3-vl", host: str = OLLAMA_HOST,
+                 cache_size: int = 256, max_px: int = 1536, jpeg_quality: int = 85,
+                 verbose: bool = False, num_batch: int = 256):
+        """
+        Initialize the Ollama client.
+
+        Args:
+            model: The vision model to use (e.g., 'qwen3-vl', 'llava', 'llama3.2-vision')
+            host: Ollama server URL
+            cache_size: Max in-memory VLM output cache entries (0 disables caching)
+            max_px: Pixel budget for the longest image side before a chat call;
+                larger images are downscaled and re-encoded as JPEG (0 disables)
+            jpeg_quality: JPEG quality used when re-encoding downscaled images
+            verbose: Print connection info and the server's model list
+            num_batch: Ollama prompt-eval batch size option (0 = server default)
+        """
+        self.model = model
+        self.host = host
+        self.max_px = max_px
+        self.jpeg_quality = jpeg_quality
+        self.verbose = verbose
+        self.num_batch = num_batch
+        # Keep the model loaded between calls so consecutive pages don't pay
+        # a model reload, and reuse one pooled HTTP connection for all calls.
+        # We talk to the REST API directly with httpx - the use here is one
+        # prompt + images in, text out, which doesn't need the ollama
+        # package's Pydantic request/response layer.
+        self._keep_alive = "30m"
+        self._http = httpx.Client(base_url=host,
+                                  timeout=httpx.Timeout(600, connect=5))
+        # LRU cache of VLM outputs keyed by SHA-256 of the page image bytes.
+        # Identical pages (repeated cover/TOC pages, reruns) skip the chat call.
+        self._cache = OrderedDict()
+        self._cache_size = max(0, cache_size)
+        self._disk_cache = None
+        if self._cache_size > 0 and diskcache is not None:
+            try:
+                self._disk_cache = diskcache.Cache(str(CACHE_DIR / "vlm"))
+            except Exception as e:
+                print(f"Warning: Could not open VLM disk cache: {e}")
+        self._verify_connection()
+
+    def _chat_stream(self, prompt: str, images: list) -> str:
+        """
+        Send one chat request with stream=True and accumulate the reply.
+
+        Streaming starts returning tokens as soon as the server produces
+        them, so producer threads (e.g. the next page's rasterization) keep
+        running during generation instead of blocking behind one long recv.
+
+        Args:
+            prompt: The user prompt
+            images: Image payloads (paths or bytes) for the message
+
+        Returns:
+            The full response text
+        """
+        payload = {
+            'model': self.model,
+            'messages': [{
+                'role': 'user',
+                'content': prompt,
+                'images': [base64.b64encode(self._to_bytes(i)).decode()
+                           for i in images],
+            }],
+            'stream': True,
+            'keep_alive': self._keep_alive,
+        }
+        if self.num_batch > 0:
+            payload['options'] = {'num_batch': self.num_batch}
+
+        buf = io.StringIO()
+        with self._http.stream("POST", "/api/chat", json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                buf.write(chunk.get('message', {}).get('content', ''))
+                if chunk.get('done'):
+                    break
+        return buf.getvalue()
+
+    def _to_bytes(self, image) -> bytes:
+        """Return raw image bytes for either a file path or a bytes payload."""
+        if isinstance(image, (bytes, bytearray)):
+            return bytes(image)
+        return Path(image).read_bytes()
+
+    def _budget_image(self, image_bytes: bytes) -> bytes:
+        """
+        Enforce the pixel budget on an image before sending it to the VLM.
+
+        Oversized vision payloads inflate prompt tokens and time-to-first-token
+        roughly linearly with pixel count, so images whose longest side exceeds
+        self.max_px are downscaled and re-encoded as JPEG in memory.
+
+        Returns:
+            Image bytes to send - the originals if already within budget.
+        """
+        if self.max_px <= 0:
+            return image_bytes
+
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                if max(img.size) <= self.max_px:
+                    return image_bytes
+                img.thumbnail((self.max_px, self.max_px))
+                buf = io.BytesIO()
+                img.convert('RGB').save(buf, 'JPEG', quality=self.jpeg_quality)
+                return buf.getvalue()
+        except Exception as e:
+            print(f"Warning: Could not downscale image for VLM: {e}")
+            return image_bytes
+
+    def _image_cache_key(self, image_bytes: bytes) -> str:
+        """Cache key for a page image: model name + SHA-256 of the image bytes."""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _cache_get(self, key: str):
+        """Look up a VLM output in the in-memory LRU, then the disk cache."""
+        if self._cache_size == 0:
+            return None
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if self._disk_cache is not None:
+            value = self._disk_cache.get(key)
+            if value is not None:
+                self._cache_put(key, value, persist=False)
+            return value
+        return None
+
+    def _cache_put(self, key: str, value: str, persist: bool = True):
+        """Store a VLM output, evicting the least recently used entry if full."""
+        if self._cache_size == 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        if persist and self._disk_cache is not None:
+            try:
+                self._disk_cache.set(key, value)
+            except Exception:
+                pass  # Disk cache is best-effort
+
+    def _verify_connection(self):
+        """Verify Ollama is running and model is available (once per process)."""
+        key = (self.host, self.model)
+        if key in OllamaClient._verified:
+            self.model = OllamaClient._verified[key]
+            return
+
+        try:
+            response = self._http.get("/api/tags")
+            response.raise_for_status()
+            available = [m['name'] for m in response.json().get('models', [])]
+
+            available_base = {m.split(':', 1)[0] for m in available}
+
+            if self.verbose:
+                print(f"Connected to Ollama at {self.host}")
+                print(f"Available models: {available}")
+
+            if self.model.split(':', 1)[0] not in available_base:
+                print(f"Warning: Model '{self.model}' not found.")
+                # Try to find a vision model - lowercase each name once
+                vision_keywords = ('llava', 'vision', 'vl', 'qwen3-vl')
+                lowered = [(m, m.lower()) for m in available]
+                vision_models = [m for m, m_lower in lowered
+                                 if any(v in m_lower for v in vision_keywords)]
+                if vision_models:
+                    self.model = vision_models[0]
+                    print(f"Using available vision model: {self.model}")
+
+            OllamaClient._verified[key] = self.model
+        except Exception as e:
+            raise ConnectionError(f"Cannot connect to Ollama at {self.host}. Error: {e}")
+    
+    def _clean_vlm_output(self, content: str) -> str:
+        """
+        Clean VLM output by removing thinking noise and markdown wrappers.
+        
+        Some VLMs include their internal reasoning in the output like:
+        'Wait, no...', 'Let me think...', 'So final Markdown:', etc.
+        This method removes such noise.
+        """
+        # Remove thinking/reasoning patterns ("Wait, no...", "Let me think...",
+        # "So final Markdown:", "Actually,...", "I notice...", "Looking at...")
+        content = _THINKING_RE.sub('\n', content)
+
+        # Remove markdown code block wrapper if present (```markdown ... ```)
+        content = _FENCE_OPEN_RE.sub('', content)
+        content = _FENCE_CLOSE_RE.sub('', content)
+
+        # Clean up multiple consecutive blank lines
+        content = _BLANKS_RE.sub('\n\n', content)
+
+        return content.strip()
+    
+    def analyze_page_image(self, image) -> str:
+        """
+        Analyze a PDF page image to extract structured content as Markdown.
+
+        Args:
+            image: Path to the page image, or the raw image bytes
+
+        Returns:
+            Markdown formatted content of the page
+        """
+        return self.analyze_page_images_batch([image])[0]
+
+    def analyze_page_images_batch(self, images: list) -> list:
+        """
+        Analyze several PDF page images in a single chat call.
+
+        Sending multiple pages per request amortizes the (identical) instruction
+        prompt across pages and removes per-request overhead. The model is asked
+        to delimit each page's output with '=== PAGE [n] ===' markers; if the
+        response cannot be split back into one chunk per page, we fall back to
+        one request per page.
+
+        Args:
+            images: Page images (paths or raw bytes), in page order
+
+        Returns:
+            Markdown formatted content for each page, in the same order
+        """
+        if len(images) == 1:
+            return [self._analyze_single(images[0])]
+
+        images_bytes = [self._to_bytes(i) for i in images]
+
+        # Serve the whole batch from cache when every page hits
+        keys = [self._image_cache_key(b) for b in images_bytes]
+        cached = [self._cache_get(k) for k in keys]
+        if all(c is not None for c in cached):
+            return cached
+
+        batch_prompt = (
+            f"You are given {len(images_bytes)} PDF page images.\n"
+            "For EACH page, in order, output a line '=== PAGE [n] ===' "
+            "(n = 1-based page index) followed by that page's content "
+            "converted to Markdown.\n\n" + _ANALYZE_RULES
+        )
+
+        content = self._chat_stream(
+            batch_prompt, [self._budget_image(b) for b in images_bytes])
+        parts = re.split(r'===\s*PAGE\s*\[\d+\]\s*===', content)
+        # First element is whatever precedes the first delimiter (usually empty)
+        parts = [p for p in parts[1:]]
+
+        if len(parts) != len(images_bytes):
+            print(f"Warning: batch response had {len(parts)} page section(s) "
+                  f"for {len(images_bytes)} page(s); retrying one page at a time")
+            return [self._analyze_single(b) for b in images_bytes]
+
+        results = [self._clean_vlm_output(p) for p in parts]
+        for key, result in zip(keys, results):
+            self._cache_put(key, result)
+        return results
+
+    def _analyze_single(self, image) -> str:
+        """Analyze a single page image (one chat call), consulting the cache."""
+        image_bytes = self._to_bytes(image)
+        key = self._image_cache_key(image_bytes)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        content = self._chat_stream(_ANALYZE_PROMPT,
+                                    [self._budget_image(image_bytes)])
+
+        # Clean up VLM output to remove thinking noise
+        cleaned = self._clean_vlm_output(content)
+        self._cache_put(key, cleaned)
+        return cleaned
+
+    def describe_image(self, image) -> str:
+        """
+        Generate a description for an extracted image/diagram.
+
+        Args:
+            image: Path to the image file, or the raw image bytes
+
+        Returns:
+            Text description of the image
+        """
+        content = self._chat_stream(
+            _DESCRIBE_PROMPT, [self._budget_image(self._to_bytes(image))])
+        return content.strip()
+
+
+if __name__ == "__main__":
+    # Quick test
+    client = OllamaClient()
+    print(f"Ollama client initialized with model: {client.model}")
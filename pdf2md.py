@@ -6,34 +6,136 @@ Converts PDF documents to Markdown while preserving layout and images.
 import fitz  # PyMuPDF
 from pathlib import Path
 from typing import Optional, List, Tuple
-import tempfile
+import hashlib
+import json
 import shutil
 import re
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from urllib.parse import quote
 
-from ollama_client import OllamaClient
+from ollama_client import CACHE_DIR, OllamaClient
+
+# Image placeholders the VLM emits, e.g. ![...](image_placeholder)
+_PLACEHOLDER_RE = re.compile(r'!\[[^\]]*\]\([^)]*placeholder[^)]*\)',
+                             re.IGNORECASE)
+
+# An existing markdown link, text and URL part
+_MD_LINK_RE = re.compile(r'\[[^\]]*\]\([^)]*\)')
+
+# Rendering-only converters by PDF path, one per worker process, so each
+# subprocess opens the document once and keeps its xref dedup cache
+_render_converters = {}
+
+
+def _prepare_page_in_worker(pdf_path: str, page_num: int, output_dir: str,
+                            images_dir: str, jpeg_quality: int,
+                            dpi_text: int, dpi_figure: int) -> dict:
+    """Render and extract one page in a subprocess (see render_procs)."""
+    converter = _render_converters.get(pdf_path)
+    if converter is None:
+        converter = PDF2Markdown._open_for_rendering(
+            pdf_path, output_dir, images_dir, jpeg_quality,
+            dpi_text, dpi_figure)
+        _render_converters[pdf_path] = converter
+    return converter._prepare_page(page_num)
 
 
 class PDF2Markdown:
     """Convert PDF to Markdown using VLM for layout understanding."""
     
-    def __init__(self, pdf_path: str, model: str = "qwen3-vl"):
+    def __init__(self, pdf_path: str, model: str = "qwen3-vl", concurrency: int = 1,
+                 vlm_batch: int = 1, vlm_cache_size: int = 256,
+                 vlm_max_px: int = 1536, vlm_jpeg_quality: int = 85,
+                 verbose: bool = False, ollama_num_batch: int = 256,
+                 dpi_text: int = 110, dpi_figure: int = 150,
+                 render_procs: int = 1,
+                 client: Optional[OllamaClient] = None):
         """
         Initialize the converter.
-        
+
         Args:
             pdf_path: Path to the PDF file
             model: Ollama vision model to use
+            concurrency: Maximum number of pages analyzed by the VLM in parallel
+            vlm_batch: Number of page images sent per VLM request (1 = no batching)
+            vlm_cache_size: Max cached VLM outputs keyed by page image content
+            vlm_max_px: Pixel budget for the longest side of images sent to the VLM
+            vlm_jpeg_quality: JPEG quality for downscaled VLM images
+            verbose: Print Ollama connection info
+            ollama_num_batch: Ollama num_batch option (0 = server default)
+            dpi_text: Render DPI for pages with no figures and plenty of text
+            dpi_figure: Render DPI for pages containing images
+            render_procs: Number of subprocesses rendering pages (1 = render
+                in-process; useful for 100+ page PDFs where MuPDF drawing is
+                the bottleneck)
+            client: Existing OllamaClient to reuse (shares its HTTP connection
+                and caches across PDFs); when given, the vlm_* args are ignored
         """
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
-        
+
         self.doc = fitz.open(pdf_path)
-        self.ollama = OllamaClient(model=model)
+        if client is not None:
+            self.ollama = client
+        else:
+            self.ollama = OllamaClient(model=model, cache_size=vlm_cache_size,
+                                       max_px=vlm_max_px,
+                                       jpeg_quality=vlm_jpeg_quality,
+                                       verbose=verbose,
+                                       num_batch=ollama_num_batch)
+        self.concurrency = max(1, concurrency)
+        self.vlm_batch = max(1, vlm_batch)
+        self.jpeg_quality = vlm_jpeg_quality
+        self.dpi_text = dpi_text
+        self.dpi_figure = dpi_figure
+        self.render_procs = max(1, render_procs)
         self.output_dir: Optional[Path] = None
         self.images_dir: Optional[Path] = None
-        
+        # Identifies this exact PDF content in the persistent page cache
+        self.pdf_hash = hashlib.md5(self.pdf_path.read_bytes()).hexdigest()
+        # PyMuPDF documents are not thread-safe - serialize all access to self.doc
+        self._doc_lock = threading.Lock()
+        # Logos/banners/watermarks repeat on nearly every page; memoize their
+        # VLM descriptions by xref, and by content hash for same-content
+        # images stored under different xrefs
+        self._desc_by_xref = {}
+        self._desc_by_digest = {}
+        # Compiled link patterns keyed by the link-text set; headers/footers
+        # repeat the same links on every page of a PDF
+        self._link_re_cache = {}
+        # (path, digest) of already-saved images by xref, so a logo reused
+        # on many pages is decoded and written to disk only once
+        self._xref_saved = {}
+
+    @classmethod
+    def _open_for_rendering(cls, pdf_path: str, output_dir: str,
+                            images_dir: str, jpeg_quality: int,
+                            dpi_text: int, dpi_figure: int) -> "PDF2Markdown":
+        """
+        Build a converter for PyMuPDF-only work in a render subprocess.
+
+        Only the fields used by _prepare_page are set up: no Ollama client is
+        created and no connection attempt is made, so workers start instantly
+        and need no server access.
+        """
+        self = cls.__new__(cls)
+        self.pdf_path = Path(pdf_path)
+        self.doc = fitz.open(pdf_path)
+        self.ollama = None
+        self.jpeg_quality = jpeg_quality
+        self.dpi_text = dpi_text
+        self.dpi_figure = dpi_figure
+        self.output_dir = Path(output_dir)
+        self.images_dir = Path(images_dir)
+        self._doc_lock = threading.Lock()
+        self._xref_saved = {}
+        return self
+
     def _setup_output_dirs(self, output_path: Optional[str] = None, images_dir: Optional[str] = None):
         """Set up output directories."""
         if output_path:
@@ -48,87 +150,50 @@ class PDF2Markdown:
         
         self.images_dir.mkdir(parents=True, exist_ok=True)
     
-    def _render_page_to_image(self, page: fitz.Page, dpi: int = 150) -> str:
+    def _render_page_to_image(self, page: fitz.Page, dpi: int = 150) -> bytes:
         """
-        Render a PDF page to an image file.
-        
+        Render a PDF page to in-memory JPEG bytes.
+
+        JPEG is 5-10x smaller than PNG for rendered text pages, which cuts
+        both the base64 upload to the Ollama server and the hashing cost of
+        the VLM output cache; MuPDF encodes it natively without PIL.
+
         Args:
             page: PyMuPDF page object
             dpi: Resolution for rendering
-            
+
         Returns:
-            Path to the rendered image
+            JPEG-encoded image bytes
         """
         zoom = dpi / 72  # 72 is the default DPI
         matrix = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=matrix)
-        
-        # Save to temp file
-        temp_path = Path(tempfile.gettempdir()) / f"pdf_page_{page.number}.png"
-        pix.save(str(temp_path))
-        
-        return str(temp_path)
+        # No alpha: a page render has no transparency and the extra channel
+        # would grow the pixmap by a third and break JPEG encoding
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+
+        return pix.tobytes("jpeg", jpg_quality=self.jpeg_quality)
     
-    def _convert_transparent_to_white(self, image_path: Path) -> None:
+    @staticmethod
+    def _composite_on_white(pix: fitz.Pixmap) -> fitz.Pixmap:
         """
-        Convert any image to have a white background.
-        This ensures images display correctly on GitHub (dark mode shows transparency as black).
-        Also handles images with embedded transparency or black backgrounds.
+        Flatten an alpha pixmap onto a white background.
+
+        This ensures images display correctly on GitHub (dark mode shows
+        transparency as black). MuPDF has no direct over-white blend, but
+        premultiplying alpha composites onto black and inverting colors swaps
+        black and white - so: invert, blend onto black, invert back. All
+        C-level, no PIL round-trip.
         """
-        from PIL import Image
-        
-        try:
-            with Image.open(image_path) as img:
-                # Always create a white background and composite the image onto it
-                # This handles:
-                # - RGBA with transparency
-                # - LA (grayscale with alpha)
-                # - P (palette) with transparency
-                # - Images with black backgrounds that should be white
-                
-                # Create white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                
-                if img.mode in ('RGBA', 'LA'):
-                    # Has alpha channel - use it as mask
-                    if img.mode == 'LA':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[3])
-                elif img.mode == 'P':
-                    # Palette mode - may have transparency
-                    if 'transparency' in img.info:
-                        img = img.convert('RGBA')
-                        background.paste(img, mask=img.split()[3])
-                    else:
-                        img = img.convert('RGB')
-                        background.paste(img)
-                elif img.mode == 'RGB':
-                    # No transparency - just copy
-                    background.paste(img)
-                elif img.mode == 'L':
-                    # Grayscale - convert to RGB
-                    img = img.convert('RGB')
-                    background.paste(img)
-                elif img.mode == 'CMYK':
-                    # CMYK - convert to RGB
-                    img = img.convert('RGB')
-                    background.paste(img)
-                else:
-                    # Unknown mode - try to convert to RGBA
-                    try:
-                        img = img.convert('RGBA')
-                        if img.mode == 'RGBA':
-                            background.paste(img, mask=img.split()[3])
-                        else:
-                            background.paste(img.convert('RGB'))
-                    except Exception:
-                        background.paste(img.convert('RGB'))
-                
-                # Save as PNG (overwrite original)
-                background.save(image_path, 'PNG')
-        except Exception as e:
-            print(f"Warning: Could not process image transparency: {e}")
-    
+        alpha = bytes(pix.samples[pix.n - 1::pix.n])
+        rgb = fitz.Pixmap(pix, 0)             # straight colors, alpha dropped
+        rgb.invert_irect(rgb.irect)           # c -> 255 - c
+        rgba = fitz.Pixmap(rgb, 1)
+        rgba.set_alpha(alpha, premultiply=1)  # blend inverted colors onto black
+        flat = fitz.Pixmap(rgba, 0)
+        flat.invert_irect(flat.irect)         # invert back: composited on white
+        return flat
+
+
     def _extract_page_links(self, page: fitz.Page) -> List[dict]:
         """
         Extract hyperlinks from a PDF page.
@@ -140,19 +205,27 @@ class PDF2Markdown:
             List of link dictionaries with 'text', 'uri', and 'type' keys
         """
         links = []
-        
-        for link in page.get_links():
+        page_links = page.get_links()
+        if not page_links:
+            return links
+
+        # One TextPage serves every clip query below; building it is
+        # O(page content) and get_text would otherwise rebuild it per link
+        textpage = page.get_textpage()
+
+        for link in page_links:
             link_info = {
                 'text': '',
                 'uri': '',
                 'type': ''
             }
-            
+
             # Get the link rectangle
             rect = link.get('from', fitz.Rect())
             if rect:
                 # Extract text within the link's bounding box
-                link_info['text'] = page.get_text("text", clip=rect).strip()
+                link_info['text'] = page.get_text(
+                    "text", clip=rect, textpage=textpage).strip()
             
             # Handle different link types
             kind = link.get('kind', 0)
@@ -174,246 +247,580 @@ class PDF2Markdown:
         
         return links
     
+    @staticmethod
+    def _existing_link_flags(markdown_content: str) -> bytearray:
+        """
+        Mark which indices of the page already sit inside a markdown link.
+
+        One linear pass with _MD_LINK_RE; positions covered by the text or
+        URL part of a [text](url) construct get flag 1, everything else 0,
+        so checking a candidate match is an O(1) lookup.
+        """
+        flags = bytearray(len(markdown_content))
+        for match in _MD_LINK_RE.finditer(markdown_content):
+            start, end = match.span()
+            flags[start:end] = b'\x01' * (end - start)
+        return flags
+
     def _apply_links_to_markdown(self, markdown_content: str, links: List[dict]) -> str:
         """
         Apply extracted PDF links to markdown content.
-        
+
+        All link texts are combined into one alternation pattern so the whole
+        page is scanned once, instead of one re.sub pass per link. Matches are
+        stitched into an output segment list rather than rebuilding the string
+        per replacement.
+
         Args:
             markdown_content: The markdown text from VLM
             links: List of link dictionaries from _extract_page_links
-            
+
         Returns:
             Markdown content with proper hyperlinks
         """
+        # Clean up texts for matching; keep the first URI seen per text.
+        # A plain substring test against the lowercased page weeds out links
+        # whose text the VLM never emitted - usually most of them - before
+        # any pattern is built or run
+        md_lower = markdown_content.lower()
+        targets = {}
         for link in links:
-            text = link['text']
-            uri = link['uri']
-            
-            if not text or not uri:
-                continue
-            
-            # Clean up text for matching (remove extra spaces/newlines)
-            clean_text = ' '.join(text.split())
-            
+            clean_text = ' '.join(link['text'].split())
             # Skip if text is too short (likely false positive)
-            if len(clean_text) < 3:
+            if len(clean_text) < 3 or not link['uri']:
                 continue
-            
-            # Escape regex special characters in the text
-            escaped_text = re.escape(clean_text)
-            
-            # Create the markdown link
-            md_link = f'[{clean_text}]({uri})'
-            
-            # We need to replace all occurrences that are NOT already markdown links
-            # Use a function to check each match
-            def replace_if_not_linked(match):
-                # Get the position of the match
-                start = match.start()
-                end = match.end()
-                
-                # Check if this text is already part of a markdown link by looking for:
-                # 1. Is it inside [...] of a link (preceded by [ and followed by ](?
-                # 2. Is it the URL part of a link (inside parentheses after ])
-                
-                # Look backwards for unmatched [
-                before = markdown_content[:start]
-                after = markdown_content[end:]
-                
-                # Check if preceded by [ without a closing ]
-                bracket_count = 0
-                for c in reversed(before[-50:]):  # Check last 50 chars
-                    if c == ']':
-                        bracket_count += 1
-                    elif c == '[':
-                        if bracket_count > 0:
-                            bracket_count -= 1
-                        else:
-                            # Found unmatched [ - we're inside link text
-                            return match.group(0)  # Don't replace
-                
-                # Check if this is followed by ]( which would mean it's the end of existing link text
-                if after.lstrip().startswith(']('):
-                    return match.group(0)  # Don't replace
-                
-                return md_link
-            
-            # Pattern to find the text (simple word boundary matching)
-            pattern = rf'(?<![[\w])({escaped_text})(?![]\w])'
-            markdown_content = re.sub(pattern, replace_if_not_linked, markdown_content, flags=re.IGNORECASE)
-        
-        return markdown_content
+            key = clean_text.lower()
+            if key not in md_lower:
+                continue
+            targets.setdefault(key, (clean_text, link['uri']))
+
+        if not targets:
+            return markdown_content
+
+        # Longest alternatives first so overlapping link texts prefer the
+        # longest match; word-boundary guards as before
+        alternation = '|'.join(re.escape(targets[key][0])
+                               for key in sorted(targets, key=len, reverse=True))
+        pattern = self._link_re_cache.get(alternation)
+        if pattern is None:
+            pattern = re.compile(rf'(?<![\[\w])({alternation})(?![\]\w])',
+                                 re.IGNORECASE)
+            self._link_re_cache[alternation] = pattern
+
+        flags = self._existing_link_flags(markdown_content)
+        segments = []
+        last = 0
+        for match in pattern.finditer(markdown_content):
+            if flags[match.start()]:
+                continue
+            clean_text, uri = targets[match.group(1).lower()]
+            segments.append(markdown_content[last:match.start()])
+            segments.append(f'[{clean_text}]({uri})')
+            last = match.end()
+
+        if not segments:
+            return markdown_content
+        segments.append(markdown_content[last:])
+        return ''.join(segments)
     
-    def _extract_page_images(self, page: fitz.Page) -> List[Tuple[str, str]]:
+    def _extract_page_images(self, page: fitz.Page) -> List[str]:
         """
-        Extract embedded images from a page.
-        
+        Extract embedded images from a page and save them to the images directory.
+
         Args:
             page: PyMuPDF page object
-            
+
         Returns:
-            List of (image_path, description) tuples
+            List of (image_path, xref, content_digest) tuples
         """
-        from PIL import Image
-        import io
-        
         images = []
         image_list = page.get_images(full=True)
-        
+
         for img_index, img_info in enumerate(image_list):
             xref = img_info[0]
             smask = img_info[1]  # SMask xref (soft mask / alpha channel)
-            
+
+            # Same xref seen on an earlier page: reuse the saved file
+            saved = self._xref_saved.get(xref)
+            if saved is not None:
+                images.append((saved[0], xref, saved[1]))
+                continue
+
             try:
-                # Extract the base image
-                base_image = self.doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                # Create image from bytes
-                pil_img = Image.open(io.BytesIO(image_bytes))
-                
-                # Check if there's an SMask (transparency mask)
-                if smask and smask > 0:
-                    try:
-                        # Extract the soft mask
-                        mask_image = self.doc.extract_image(smask)
-                        mask_bytes = mask_image["image"]
-                        mask_pil = Image.open(io.BytesIO(mask_bytes))
-                        
-                        # Convert mask to proper mode
-                        if mask_pil.mode != 'L':
-                            mask_pil = mask_pil.convert('L')
-                        
-                        # Ensure both images are the same size
-                        if mask_pil.size != pil_img.size:
-                            mask_pil = mask_pil.resize(pil_img.size, Image.LANCZOS)
-                        
-                        # Add alpha channel to image
-                        if pil_img.mode == 'RGB':
-                            pil_img = pil_img.convert('RGBA')
-                        elif pil_img.mode != 'RGBA':
-                            pil_img = pil_img.convert('RGBA')
-                        
-                        # Put the mask as alpha channel
-                        pil_img.putalpha(mask_pil)
-                    except Exception as e:
-                        print(f"Warning: Could not apply SMask: {e}")
-                
+                pix = fitz.Pixmap(self.doc, xref)
+
+                # Attach any soft mask as an alpha channel (done in C,
+                # including resizing a mask of different dimensions)
+                if smask > 0 and not pix.alpha:
+                    pix = fitz.Pixmap(pix, fitz.Pixmap(self.doc, smask))
+                digest = hashlib.blake2b(pix.samples, digest_size=16).hexdigest()
+
+                # PNG output needs gray or RGB (e.g. CMYK must be converted)
+                if pix.colorspace is None or pix.n - pix.alpha > 3:
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+
+                # Flatten transparency onto white for GitHub compatibility
+                if pix.alpha:
+                    pix = self._composite_on_white(pix)
+
                 # Save image with PDF-specific prefix for unique naming across batch processing
                 pdf_prefix = self.pdf_path.stem[:20]  # Limit prefix length
                 image_name = f"{pdf_prefix}_p{page.number + 1}_img{img_index + 1}.png"
                 image_path = self.images_dir / image_name
-                
-                # Save as PNG first
-                if pil_img.mode in ('RGBA', 'P'):
-                    pil_img.save(image_path, 'PNG')
-                else:
-                    pil_img.convert('RGB').save(image_path, 'PNG')
-                
-                # Convert transparent background to white for GitHub compatibility
-                self._convert_transparent_to_white(image_path)
-                
-                # Get description from VLM
-                try:
-                    description = self.ollama.describe_image(str(image_path))
-                except Exception as e:
-                    description = f"Image from page {page.number + 1}"
-                    print(f"Warning: Could not describe image: {e}")
-                
-                images.append((str(image_path), description))
-                
+                pix.save(image_path)
+
+                self._xref_saved[xref] = (str(image_path), digest)
+                images.append((str(image_path), xref, digest))
+
             except Exception as e:
                 print(f"Warning: Could not extract image {img_index}: {e}")
-        
+
         return images
-    
-    def convert_page(self, page_num: int) -> str:
+
+    def _describe_images(self, image_infos: List[Tuple[str, int, str]],
+                         page_num: int) -> List[Tuple[str, str]]:
         """
-        Convert a single page to Markdown.
-        
+        Generate VLM descriptions for extracted images.
+
+        Descriptions are memoized per document by xref and by content digest,
+        so a logo or banner repeated on every page is described once. Cache
+        misses are fanned out to the VLM concurrently; each call is an
+        independent network round-trip and the server batches them.
+
+        Args:
+            image_infos: (path, xref, digest) tuples from _extract_page_images
+            page_num: Page number (0-indexed), used for fallback descriptions
+
+        Returns:
+            List of (image_path, description) tuples
+        """
+        # Resolve cache hits and collect misses, deduped by digest so one
+        # image appearing twice on a page is only requested once
+        descriptions = {}
+        misses = {}
+        failed = set()
+        for image_path, xref, digest in image_infos:
+            description = self._desc_by_xref.get(xref)
+            if description is None:
+                description = self._desc_by_digest.get(digest)
+            if description is None:
+                misses.setdefault(digest, image_path)
+            else:
+                descriptions[digest] = description
+
+        def describe_one(item):
+            digest, image_path = item
+            try:
+                description = self.ollama.describe_image(image_path)
+            except Exception as e:
+                print(f"Warning: Could not describe image: {e}")
+                return digest, f"Image from page {page_num + 1}", False
+            return digest, description, True
+
+        if misses:
+            if len(misses) == 1:
+                results = [describe_one(next(iter(misses.items())))]
+            else:
+                with ThreadPoolExecutor(max_workers=min(8, len(misses))) as pool:
+                    results = list(pool.map(describe_one, misses.items()))
+            for digest, description, ok in results:
+                descriptions[digest] = description
+                if ok:
+                    self._desc_by_digest[digest] = description
+                else:
+                    failed.add(digest)
+
+        images = []
+        for image_path, xref, digest in image_infos:
+            description = descriptions[digest]
+            if digest not in failed:
+                self._desc_by_xref.setdefault(xref, description)
+            images.append((image_path, description))
+        return images
+
+    def _prepare_page(self, page_num: int) -> dict:
+        """
+        Do all PyMuPDF work for a page: render it and extract images/links.
+
+        Runs under the document lock so pages can be prepared from multiple
+        threads. VLM calls happen later, outside the lock.
+
         Args:
             page_num: Page number (0-indexed)
-            
+
         Returns:
-            Markdown content for the page
+            Dict with 'page_num', 'image_infos', 'links' and 'page_image'
+            ('page_image' is None for blank pages that need no VLM analysis)
         """
         if page_num >= len(self.doc):
             raise ValueError(f"Page {page_num} does not exist. PDF has {len(self.doc)} pages.")
-        
-        page = self.doc[page_num]
+
         print(f"Processing page {page_num + 1}/{len(self.doc)}...")
-        
-        # Extract embedded images first
-        extracted_images = self._extract_page_images(page)
-        
-        # Extract hyperlinks from the page
-        extracted_links = self._extract_page_links(page)
-        
-        # Render page to image for VLM analysis
-        page_image_path = self._render_page_to_image(page)
-        
+
+        with self._doc_lock:
+            page = self.doc[page_num]
+
+            # Extract embedded images first
+            image_infos = self._extract_page_images(page)
+
+            # Extract hyperlinks from the page
+            extracted_links = self._extract_page_links(page)
+
+            page_text = page.get_text()
+
+            # Blank separator/cover pages: nothing for the VLM to look at,
+            # so skip rendering entirely (page_image None = no analysis)
+            if not image_infos and len(page_text.strip()) < 5:
+                page_image = None
+            else:
+                # Render page to an in-memory image for VLM analysis.
+                # Rendering cost is quadratic in DPI, and text-only pages
+                # stay readable to the VLM at a lower resolution than pages
+                # with figures
+                if not image_infos and len(page_text) > 500:
+                    dpi = self.dpi_text
+                else:
+                    dpi = self.dpi_figure
+                page_image = self._render_page_to_image(page, dpi=dpi)
+
+        return {
+            'page_num': page_num,
+            'image_infos': image_infos,
+            'links': extracted_links,
+            'page_image': page_image,
+        }
+
+    def _finalize_page(self, prep: dict, markdown_content: str,
+                       extracted_images: Optional[List[Tuple[str, str]]] = None) -> str:
+        """
+        Post-process the VLM output for a prepared page: describe extracted
+        images, splice in image references, and apply hyperlinks.
+
+        Args:
+            prep: Page data from _prepare_page
+            markdown_content: Raw Markdown from the VLM for this page
+            extracted_images: (path, description) tuples when descriptions
+                were already fetched concurrently; None to fetch them here
+
+        Returns:
+            Final Markdown content for the page
+        """
+        page_num = prep['page_num']
+        extracted_links = prep['links']
+
+        # Get descriptions for extracted images (VLM calls)
+        if extracted_images is None:
+            extracted_images = self._describe_images(prep['image_infos'], page_num)
+
+        # Replace image placeholders with actual image references
+        # VLM may output variations like: ![...](image_placeholder), ![...](...placeholder...), etc.
+        image_mds = []
+        for img_path, description in extracted_images:
+            # Make path relative to output directory and use forward slashes for GitHub compatibility
+            rel_path = Path(img_path).relative_to(self.output_dir) if self.output_dir else Path(img_path)
+            rel_path_str = rel_path.as_posix()  # Convert to forward slashes for cross-platform
+            # URL-encode the path for GitHub compatibility (spaces, special chars)
+            # Use quote with safe='/' to preserve directory separators
+            rel_path_encoded = quote(rel_path_str, safe='/')
+            # Clean description for markdown (remove newlines, limit length)
+            clean_desc = description.replace('\n', ' ').strip()[:100]
+            image_mds.append(f"![{clean_desc}]({rel_path_encoded})")
+
+        # Single pass over the markdown: pair placeholders with images in
+        # order, dropping excess placeholders (VLM may reference more images
+        # than the PDF has) and appending images with no placeholder left
+        segments = []
+        last = 0
+        next_img = 0
+        for match in _PLACEHOLDER_RE.finditer(markdown_content):
+            segments.append(markdown_content[last:match.start()])
+            if next_img < len(image_mds):
+                segments.append(image_mds[next_img])
+                next_img += 1
+            last = match.end()
+        segments.append(markdown_content[last:])
+        for img_md in image_mds[next_img:]:
+            segments.append(f"\n\n{img_md}\n")
+        markdown_content = ''.join(segments)
+
+        # Apply extracted hyperlinks to markdown
+        if extracted_links:
+            markdown_content = self._apply_links_to_markdown(markdown_content, extracted_links)
+
+        self._store_cached_page(page_num, markdown_content,
+                                [info[0] for info in prep['image_infos']])
+        return markdown_content
+
+    def convert_page(self, page_num: int) -> str:
+        """
+        Convert a single page to Markdown.
+
+        Args:
+            page_num: Page number (0-indexed)
+
+        Returns:
+            Markdown content for the page
+        """
+        prep = self._prepare_page(page_num)
+
+        if prep['page_image'] is None:
+            return self._finalize_page(prep, "")
+
+        # Page analysis and image descriptions are independent VLM requests,
+        # so overlap them instead of running them back to back
+        if prep['image_infos']:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                desc_future = pool.submit(self._describe_images,
+                                          prep['image_infos'], page_num)
+                markdown_content = self.ollama.analyze_page_image(
+                    prep['page_image'])
+                extracted_images = desc_future.result()
+        else:
+            markdown_content = self.ollama.analyze_page_image(prep['page_image'])
+            extracted_images = []
+        return self._finalize_page(prep, markdown_content, extracted_images)
+
+
+    def _page_cache_path(self, page_num: int) -> Path:
+        """Path of the persistent cache entry for one page of this PDF."""
+        return CACHE_DIR / "pages" / self.pdf_hash / f"{page_num}.json"
+
+    def _load_cached_page(self, page_num: int) -> Optional[str]:
+        """
+        Return the finished markdown for a page from the persistent cache,
+        or None when there is no entry, it was produced by another model,
+        or an image file it references no longer exists.
+        """
         try:
-            # Get structured content from VLM
-            markdown_content = self.ollama.analyze_page_image(page_image_path)
-            
-            # Replace image placeholders with actual image references
-            # VLM may output variations like: ![...](image_placeholder), ![...](...placeholder...), etc.
-            if extracted_images:
-                for img_path, description in extracted_images:
-                    # Make path relative to output directory and use forward slashes for GitHub compatibility
-                    rel_path = Path(img_path).relative_to(self.output_dir) if self.output_dir else Path(img_path)
-                    rel_path_str = rel_path.as_posix()  # Convert to forward slashes for cross-platform
-                    # URL-encode the path for GitHub compatibility (spaces, special chars)
-                    # Use quote with safe='/' to preserve directory separators
-                    rel_path_encoded = quote(rel_path_str, safe='/')
-                    # Clean description for markdown (remove newlines, limit length)
-                    clean_desc = description.replace('\n', ' ').strip()[:100]
-                    img_md = f"![{clean_desc}]({rel_path_encoded})"
-                    
-                    # Use regex to find and replace image placeholders
-                    # Match patterns like: ![any text](image_placeholder) or ![any](any_placeholder)
-                    placeholder_pattern = r'!\[[^\]]*\]\([^)]*placeholder[^)]*\)'
-                    if re.search(placeholder_pattern, markdown_content, re.IGNORECASE):
-                        markdown_content = re.sub(
-                            placeholder_pattern,
-                            img_md,
-                            markdown_content,
-                            count=1,
-                            flags=re.IGNORECASE
-                        )
-                    else:
-                        # Append image at end if no placeholder found
-                        markdown_content += f"\n\n{img_md}\n"
-            
-            # Clean up any remaining unfilled image placeholders
-            # (VLM may reference more images than actually exist in the PDF)
-            placeholder_pattern = r'!\[[^\]]*\]\([^)]*placeholder[^)]*\)'
-            markdown_content = re.sub(placeholder_pattern, '', markdown_content, flags=re.IGNORECASE)
-            
-            # Apply extracted hyperlinks to markdown
-            if extracted_links:
-                markdown_content = self._apply_links_to_markdown(markdown_content, extracted_links)
-            
-            return markdown_content
-            
-        finally:
-            # Cleanup temp page image
-            Path(page_image_path).unlink(missing_ok=True)
-    
+            data = json.loads(
+                self._page_cache_path(page_num).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if data.get('model') != self.ollama.model:
+            return None
+        if any(not Path(p).exists() for p in data.get('images', [])):
+            return None
+        return data.get('markdown')
+
+    def _store_cached_page(self, page_num: int, markdown: str,
+                           image_paths: List[str]) -> None:
+        """Persist a page's finished markdown (atomic write-then-rename)."""
+        cache_path = self._page_cache_path(page_num)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps({
+                'model': self.ollama.model,
+                'markdown': markdown,
+                'images': image_paths,
+            }), encoding="utf-8")
+            temp_path.replace(cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write page cache: {e}")
+
+    def _iter_prepared_pages(self, page_nums):
+        """
+        Yield prepared pages while a background thread renders ahead.
+
+        A producer thread runs _prepare_page (pure PyMuPDF work) so page N+1
+        is rasterized while page N waits on the VLM. The bounded queue keeps
+        pixmap memory in check on large scanned PDFs.
+
+        Args:
+            page_nums: Page numbers to prepare, in order
+
+        Yields:
+            Page dicts from _prepare_page, in page order
+        """
+        prepared = queue.Queue(maxsize=4)
+
+        def produce():
+            try:
+                for page_num in page_nums:
+                    prepared.put(self._prepare_page(page_num))
+            except Exception as e:
+                prepared.put(e)
+            prepared.put(None)  # Sentinel: no more pages
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        while True:
+            item = prepared.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+        producer.join()
+
+    def _iter_prepared_pages_mp(self, page_nums):
+        """
+        Yield prepared pages rendered by a pool of subprocesses.
+
+        MuPDF drawing is CPU-bound and serialized by the document lock, so
+        for long PDFs render_procs workers each open their own copy of the
+        document and prepare pages in parallel. A bounded submission window
+        keeps at most 2 pages per worker in flight.
+
+        Args:
+            page_nums: Page numbers to prepare, in order
+
+        Yields:
+            Page dicts from _prepare_page, in page order
+        """
+        args = (str(self.pdf_path), str(self.output_dir),
+                str(self.images_dir), self.jpeg_quality,
+                self.dpi_text, self.dpi_figure)
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.render_procs) as pool:
+            for page_num in page_nums:
+                pending.append(pool.submit(
+                    _prepare_page_in_worker, args[0], page_num, *args[1:]))
+                if len(pending) >= self.render_procs * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _iter_preps(self, page_nums):
+        """
+        Prepared pages in order: from the subprocess pool when render_procs
+        is greater than 1, otherwise from the in-process producer thread.
+        """
+        if self.render_procs > 1:
+            return self._iter_prepared_pages_mp(page_nums)
+        return self._iter_prepared_pages(page_nums)
+
+    def _convert_pages_pipelined(self, page_nums: List[int]) -> List[str]:
+        """
+        Convert pages through a three-stage pipeline.
+
+        Stage A (producer thread inside _iter_prepared_pages) renders pages
+        and extracts images/links; stage B (worker thread here) runs the VLM
+        page analysis; stage C (caller's thread) finalizes - image
+        descriptions and markdown post-processing. Each stage works on a
+        different page at the same time, connected by bounded queues.
+
+        Args:
+            page_nums: Page numbers to convert, in order
+
+        Yields:
+            Markdown content for each page, in the same order
+        """
+        analyzed = queue.Queue(maxsize=4)
+
+        def analyze():
+            try:
+                for prep in self._iter_preps(page_nums):
+                    if prep['page_image'] is None:
+                        analyzed.put((prep, ""))
+                        continue
+                    markdown_content = self.ollama.analyze_page_image(
+                        prep['page_image'])
+                    analyzed.put((prep, markdown_content))
+            except Exception as e:
+                analyzed.put(e)
+            analyzed.put(None)  # Sentinel: no more pages
+
+        worker = threading.Thread(target=analyze, daemon=True)
+        worker.start()
+
+        while True:
+            item = analyzed.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            prep, markdown_content = item
+            yield self._finalize_page(prep, markdown_content)
+
+        worker.join()
+
+    def _convert_pages_batched(self, page_nums: List[int]) -> List[str]:
+        """
+        Convert pages in groups of self.vlm_batch, sending one VLM request
+        per group to amortize the instruction prompt across pages.
+
+        Up to self.concurrency batch requests are kept in flight at once, so
+        the server can exploit continuous batching while the next group is
+        still being rendered. At most concurrency * vlm_batch rendered pages
+        are held in memory.
+
+        Args:
+            page_nums: Page numbers to convert, in order
+
+        Yields:
+            Markdown content for each page, in the same order
+        """
+        pending = deque()
+
+        def drain_one():
+            preps, future = pending.popleft()
+            results = iter(future.result()) if future is not None else iter(())
+            for prep in preps:
+                if prep['page_image'] is None:
+                    yield self._finalize_page(prep, "")
+                else:
+                    yield self._finalize_page(prep, next(results))
+
+        prep_iter = self._iter_preps(page_nums)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while True:
+                preps = list(islice(prep_iter, self.vlm_batch))
+                if not preps:
+                    break
+                images = [p['page_image'] for p in preps
+                          if p['page_image'] is not None]
+                future = (pool.submit(self.ollama.analyze_page_images_batch,
+                                      images) if images else None)
+                pending.append((preps, future))
+                if len(pending) >= self.concurrency:
+                    yield from drain_one()
+            while pending:
+                yield from drain_one()
+
+    @staticmethod
+    def _write_pages(md_file, page_nums: List[int], cached: dict,
+                     fresh_iter) -> None:
+        """
+        Write pages to the output file in page order as they finish.
+
+        Flushes after every page so the file survives a crash mid-document
+        and can be followed with tail -f during long VLM jobs.
+
+        Args:
+            md_file: Open text file to write to
+            page_nums: All page numbers, in output order
+            cached: Finished markdown by page number (persistent cache hits)
+            fresh_iter: Markdown for the remaining pages, in page order
+        """
+        for i, page_num in enumerate(page_nums):
+            content = cached.get(page_num)
+            if content is None:
+                content = next(fresh_iter)
+            if i:
+                md_file.write("\n\n---\n\n")  # Page separator
+            md_file.write(content)
+            md_file.flush()
+
     def convert(
         self,
         output_path: Optional[str] = None,
         images_dir: Optional[str] = None,
-        page_range: Optional[Tuple[int, int]] = None
+        page_range: Optional[Tuple[int, int]] = None,
+        force_refresh: bool = False
     ) -> str:
         """
         Convert PDF to Markdown.
-        
+
         Args:
             output_path: Path for output Markdown file
             images_dir: Directory to save extracted images
             page_range: Optional (start, end) tuple for page range (0-indexed, inclusive)
-            
+            force_refresh: Reprocess every page even if a cached result exists
+
         Returns:
             Path to the generated Markdown file
         """
@@ -433,22 +840,40 @@ class PDF2Markdown:
             end_page = min(len(self.doc) - 1, page_range[1])
         
         print(f"Converting pages {start_page + 1} to {end_page + 1}...")
-        
-        # Convert pages
-        all_content = []
-        for page_num in range(start_page, end_page + 1):
-            content = self.convert_page(page_num)
-            all_content.append(content)
-            all_content.append("\n\n---\n\n")  # Page separator
-        
-        # Remove last separator
-        if all_content:
-            all_content.pop()
-        
-        # Write output
-        full_content = "".join(all_content)
-        md_path.write_text(full_content, encoding="utf-8")
-        
+
+        page_nums = list(range(start_page, end_page + 1))
+
+        # Reuse finished pages from the persistent cache (keyed by PDF
+        # content hash + page number) unless a refresh was forced
+        cached = {}
+        if not force_refresh:
+            for page_num in page_nums:
+                markdown = self._load_cached_page(page_num)
+                if markdown is not None:
+                    cached[page_num] = markdown
+        if cached:
+            print(f"Reusing {len(cached)} cached page(s)")
+
+        todo = [n for n in page_nums if n not in cached]
+
+        # Convert pages - batched or concurrent if requested - and stream
+        # them to disk in page order as they finish, so long conversions can
+        # be tailed and a crash keeps the pages already done
+        with md_path.open("w", encoding="utf-8") as md_file:
+            if self.vlm_batch > 1:
+                self._write_pages(md_file, page_nums, cached,
+                                  self._convert_pages_batched(todo))
+            elif self.concurrency > 1:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    futures = [pool.submit(self.convert_page, n) for n in todo]
+                    self._write_pages(md_file, page_nums, cached,
+                                      (future.result() for future in futures))
+            else:
+                # Sequential VLM calls, pipelined so rendering, page analysis,
+                # and finalization each overlap across neighbouring pages
+                self._write_pages(md_file, page_nums, cached,
+                                  self._convert_pages_pipelined(todo))
+
         print(f"✓ Markdown saved to: {md_path}")
         print(f"✓ Images saved to: {self.images_dir}")
         